@@ -0,0 +1,233 @@
+import functools
+import hashlib
+import json
+import sqlite3
+import time
+
+# -------------------- Settings --------------------
+MAX_ENTRIES = 1000
+SIMILARITY_THRESHOLD = 0.92
+
+_conn = None
+
+# Normalized embeddings of cached entries, rows aligned with _matrix_keys
+# and _matrix_scopes
+_matrix = None
+_matrix_keys = []
+_matrix_scopes = []
+
+
+# -------------------- Connection --------------------
+def open_cache(path: str):
+    """
+    Opens (or creates) the SQLite cache at the given path.
+    Until it is opened, every lookup misses and every store is a no-op.
+    """
+    global _conn
+
+    _conn = sqlite3.connect(path)
+    _conn.execute("PRAGMA journal_mode=WAL")
+    _conn.execute("""
+        CREATE TABLE IF NOT EXISTS answers (
+            key BLOB PRIMARY KEY,
+            answers_json TEXT NOT NULL,
+            ts REAL NOT NULL,
+            embedding BLOB,
+            scope BLOB
+        )
+        """)
+    # Caches created before scopes existed; their rows never match fuzzily
+    columns = {row[1] for row in _conn.execute("PRAGMA table_info(answers)")}
+    if "scope" not in columns:
+        _conn.execute("ALTER TABLE answers ADD COLUMN scope BLOB")
+    _conn.execute("""
+        CREATE TABLE IF NOT EXISTS responses (
+            key BLOB PRIMARY KEY,
+            text TEXT NOT NULL,
+            ts REAL NOT NULL
+        )
+        """)
+    _conn.commit()
+    _invalidate_matrix()
+
+
+def make_key(model_name: str, prompt: str, prefix: str = "") -> bytes:
+    """
+    Hashes the model name with prefix + prompt. The prefix (the shared
+    profile) is hashed once per process and only the prompt per call;
+    the key is the same as for the joined string.
+    """
+    digest = _prefix_hash(model_name, prefix).copy()
+    digest.update(prompt.encode("utf-8"))
+    return digest.digest()
+
+
+@functools.cache
+def _prefix_hash(model_name: str, prefix: str):
+    return hashlib.sha256(f"{model_name}\0{prefix}".encode("utf-8"))
+
+
+# -------------------- Exact Lookups --------------------
+def get(key: bytes):
+    """
+    Returns the cached answers for an exact key, or None on a miss.
+    """
+    if _conn is None:
+        return None
+    row = _conn.execute(
+        "SELECT answers_json FROM answers WHERE key = ?", (key,)
+    ).fetchone()
+    if row is None:
+        return None
+    _touch(key)
+    return _decode(row[0])
+
+
+def put(key: bytes, answers: dict, embedding=None, scope: bytes = None):
+    """
+    Stores answers under the key, evicting the least recently used
+    entries once the cache grows past MAX_ENTRIES. The embedding is only
+    matched by lookups with the same scope.
+    """
+    if _conn is None:
+        return
+    blob = None
+    if embedding is not None:
+        import numpy as np
+
+        vec = _normalize(np.asarray(embedding, dtype=np.float32))
+        blob = vec.tobytes()
+        if _matrix is not None:
+            _append_to_matrix(key, vec, scope)
+
+    _conn.execute(
+        "INSERT OR REPLACE INTO answers (key, answers_json, ts, embedding, scope) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (key, json.dumps(answers, ensure_ascii=False), time.time(), blob, scope),
+    )
+    trimmed = _conn.execute(
+        "DELETE FROM answers WHERE key NOT IN "
+        "(SELECT key FROM answers ORDER BY ts DESC LIMIT ?)",
+        (MAX_ENTRIES,),
+    ).rowcount
+    _conn.commit()
+    if trimmed:
+        # Evicted rows would still be matched; rebuilt on the next lookup
+        _invalidate_matrix()
+
+
+# -------------------- Raw Responses --------------------
+def get_response(key: bytes):
+    """
+    Returns the cached response text for a prompt key, or None on a miss.
+    """
+    if _conn is None:
+        return None
+    row = _conn.execute("SELECT text FROM responses WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+    _conn.execute("UPDATE responses SET ts = ? WHERE key = ?", (time.time(), key))
+    _conn.commit()
+    return row[0]
+
+
+def put_response(key: bytes, text: str):
+    if _conn is None:
+        return
+    _conn.execute(
+        "INSERT OR REPLACE INTO responses (key, text, ts) VALUES (?, ?, ?)",
+        (key, text, time.time()),
+    )
+    _conn.execute(
+        "DELETE FROM responses WHERE key NOT IN "
+        "(SELECT key FROM responses ORDER BY ts DESC LIMIT ?)",
+        (MAX_ENTRIES,),
+    )
+    _conn.commit()
+
+
+# -------------------- Similarity Lookups --------------------
+def get_similar(embedding, scope: bytes, threshold: float = SIMILARITY_THRESHOLD):
+    """
+    Returns the answers of the most similar cached entry stored with the
+    same scope, when its cosine similarity to the given embedding is at
+    least the threshold.
+    """
+    if _conn is None:
+        return None
+    import numpy as np
+
+    _load_matrix()
+    in_scope = np.array([s == scope for s in _matrix_scopes], dtype=bool)
+    if not in_scope.any():
+        return None
+
+    query = _normalize(np.asarray(embedding, dtype=np.float32))
+    scores = np.where(in_scope, _matrix @ query, -np.inf)
+    best = int(np.argmax(scores))
+    if scores[best] < threshold:
+        return None
+    return get(_matrix_keys[best])
+
+
+def _load_matrix():
+    global _matrix, _matrix_keys, _matrix_scopes
+    if _matrix is not None:
+        return
+    import numpy as np
+
+    rows = _conn.execute(
+        "SELECT key, embedding, scope FROM answers "
+        "WHERE embedding IS NOT NULL AND scope IS NOT NULL"
+    ).fetchall()
+    _matrix_keys = [row[0] for row in rows]
+    _matrix_scopes = [row[2] for row in rows]
+    if rows:
+        _matrix = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+    else:
+        _matrix = np.empty((0, 0), dtype=np.float32)
+
+
+def _invalidate_matrix():
+    global _matrix, _matrix_keys, _matrix_scopes
+    _matrix = None
+    _matrix_keys = []
+    _matrix_scopes = []
+
+
+def _append_to_matrix(key: bytes, vec, scope: bytes):
+    global _matrix
+    import numpy as np
+
+    if scope is None:
+        return
+    if key in _matrix_keys:
+        row = _matrix_keys.index(key)
+        _matrix[row] = vec
+        _matrix_scopes[row] = scope
+    elif _matrix.size == 0:
+        _matrix = vec[np.newaxis, :]
+        _matrix_keys.append(key)
+        _matrix_scopes.append(scope)
+    else:
+        _matrix = np.vstack([_matrix, vec])
+        _matrix_keys.append(key)
+        _matrix_scopes.append(scope)
+
+
+# -------------------- Helpers --------------------
+def _touch(key: bytes):
+    _conn.execute("UPDATE answers SET ts = ? WHERE key = ?", (time.time(), key))
+    _conn.commit()
+
+
+def _decode(answers_json: str) -> dict:
+    # JSON object keys are strings; answers are indexed by question position
+    return {int(k): v for k, v in json.loads(answers_json).items()}
+
+
+def _normalize(vec):
+    import numpy as np
+
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
@@ -1,12 +1,35 @@
 import os
+import pathlib
 import json
+import argparse
+import asyncio
+import contextlib
+import datetime
+import functools
+import hashlib
+import importlib.util
+import multiprocessing
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import typing
+from concurrent.futures import ProcessPoolExecutor
+import orjson
 from dotenv import load_dotenv
 import google.generativeai as genai
-import PyPDF2
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.pagesizes import LETTER
-from reportlab.lib.units import inch
+from google.generativeai import caching
+from google.api_core import exceptions as google_exceptions
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+import answer_cache
+import pdf_export
 
 # -------------------- Load Environment --------------------
 load_dotenv()
@@ -15,8 +38,74 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     raise RuntimeError("GEMINI_API_KEY not found in environment.")
 
+# Left to its defaults, the SDK builds the async client on grpc_asyncio and
+# the sync ones (token counting, context cache) on grpc. Each client is
+# created once and keeps one HTTP/2 channel, so concurrent requests share a
+# connection. Pinning transport="grpc" would hand the async client a
+# blocking channel; pinning "grpc_asyncio" breaks the sync calls
 genai.configure(api_key=GEMINI_API_KEY)
-gmodel = genai.GenerativeModel("gemini-2.0-flash")
+
+GEMINI_MODEL = "gemini-2.5-flash-lite"
+GENERATION_CONFIG = genai.GenerationConfig(temperature=0.3, candidate_count=1)
+gmodel = genai.GenerativeModel(GEMINI_MODEL, generation_config=GENERATION_CONFIG)
+
+# Output tokens dominate latency, so cap them to what each call needs
+ANSWER_TOKENS_PER_QUESTION = 200
+COVER_LETTER_MAX_TOKENS = 1024
+
+# Requests in flight at once across all jobs, to stay under Gemini rate
+# limits; raise GEMINI_MAX_CONCURRENCY on paid tiers with higher quotas
+MAX_CONCURRENT_REQUESTS = max(1, int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")))
+gemini_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+# Rate limits and server errors are retried with jittered backoff instead
+# of failing the job
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.InternalServerError,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+)
+GEMINI_MAX_ATTEMPTS = 6
+GEMINI_BACKOFF_MAX_SECONDS = 30
+
+# Set GEMINI_RPM to the account's requests-per-minute quota to pace
+# requests under it instead of running into 429s (needs aiolimiter)
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "0"))
+if GEMINI_RPM > 0:
+    from aiolimiter import AsyncLimiter
+
+    gemini_rate_limiter = AsyncLimiter(GEMINI_RPM, 60)
+else:
+    gemini_rate_limiter = contextlib.nullcontext()
+
+CACHE_MODEL = f"models/{GEMINI_MODEL}"
+CACHE_MIN_TOKENS = 1024
+CACHE_TTL = datetime.timedelta(hours=1)
+# Long runs extend the cache this close to expiry instead of losing it
+CACHE_REFRESH_MARGIN = datetime.timedelta(minutes=10)
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+# Set LLM_CACHE_ENABLED=0 (or pass --no-cache) to always call Gemini
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+# Reuse answers from a near-identical earlier job (needs numpy)
+ANSWER_CACHE_FUZZY = os.getenv("ANSWER_CACHE_FUZZY") == "1"
+# Answer near-duplicate questions at the same company once (needs numpy)
+CLUSTER_QUESTIONS = os.getenv("CLUSTER_QUESTIONS") == "1"
+QUESTION_SIMILARITY = 0.95
+# Jobs generated together in one request; above 1, fewer round trips at
+# the cost of one failed reply affecting the whole group
+JOBS_PER_REQUEST = max(1, int(os.getenv("JOBS_PER_REQUEST", "1")))
+
+# The marker that starts a numbered answer: "3. ", "3) " or "**3.** " at the
+# start of a line; splitting on it leaves alternating numbers and answers.
+# Whitespace must follow, so a line starting "3.5 years" isn't a new answer
+NUMBERED_ANSWER_SPLIT = re.compile(r"^\s*(?:\*\*)?(\d+)[.)](?:\*\*)?\s+", re.MULTILINE)
+
+# Runs of anything but letters, digits, ".", "_" and "-" become one "_" in
+# file names, so a "/" in a job title can't point into a missing folder.
+# Letters and digits in any script are kept, so "株式会社" stays readable
+UNSAFE_FILENAME_CHARS = re.compile(r"[^\w.-]+")
 
 # -------------------- Applicant Info --------------------
 APPLICANT = {
@@ -32,101 +121,620 @@ APPLICANT = {
 # -------------------- File Paths --------------------
 JOB_LIST_JSON = "jobs_to_apply.json"
 OUTPUT_JSON = "output.json"
-COVER_LETTER_PDFS_DIR = "cover_letters"
-QA_PDFS_DIR = "qa_pdfs"
+# One record per job, written as it finishes; jobs that already have one
+# are skipped on the next run
+OUTPUT_SHARDS_DIR = pathlib.Path("output")
+COVER_LETTER_PDFS_DIR = pathlib.Path("cover_letters")
+QA_PDFS_DIR = pathlib.Path("qa_pdfs")
+# ReportLab is CPU-bound Python, so PDFs render in worker processes, off
+# the event loop and in parallel with each other and pending Gemini calls.
+# Each spawned worker re-imports this module, so only a few are started
+PDF_WORKERS = min(os.cpu_count() or 1, 4)
+ANSWER_CACHE_DB = "answer_cache.sqlite3"
+RESUME_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "job_applyer")
+
+# Created once here so the savers never check for them
+COVER_LETTER_PDFS_DIR.mkdir(parents=True, exist_ok=True)
+QA_PDFS_DIR.mkdir(parents=True, exist_ok=True)
+OUTPUT_SHARDS_DIR.mkdir(parents=True, exist_ok=True)
 
 
 # -------------------- Resume Extraction --------------------
 def extract_resume_text(path):
     if not path or not os.path.exists(path):
         return ""
-    text = ""
-    with open(path, "rb") as f:
-        reader = PyPDF2.PdfReader(f)
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-    return text.strip()
 
+    # Reuse the text from a previous run while the PDF is unchanged
+    st = os.stat(path)
+    backend = _resume_backend()
+    # The extractor name is part of the key so a backend change re-extracts;
+    # the version of the file is kept readable so older ones can be found
+    key = f"{backend}:{os.path.abspath(path)}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    prefix = f"resume_{digest}_"
+    cache_path = os.path.join(
+        RESUME_CACHE_DIR, f"{prefix}{st.st_mtime_ns}-{st.st_size}.txt"
+    )
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return f.read()
 
-RESUME_TEXT = extract_resume_text(APPLICANT["resume_path"])
+    if backend == "pdftotext":
+        text = _pdftotext(path)
+    else:
+        text = _pdfium_text(path)
 
+    os.makedirs(RESUME_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=RESUME_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, cache_path)
 
-# -------------------- AI Answer Generator --------------------
-def generate_batch_ai_answers(job_description: str, questions: list, company: str):
+    # Text of earlier versions of this resume is never read again
+    for name in os.listdir(RESUME_CACHE_DIR):
+        if name.startswith(prefix) and name != os.path.basename(cache_path):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(RESUME_CACHE_DIR, name))
+
+    return text
+
+
+def _resume_backend():
     """
-    Generates AI answers for a list of application questions,
-    tailored to the applicant's resume and the specific company.
+    Uses PDFium when pypdfium2 is installed, else poppler's pdftotext when
+    it's on PATH. With neither, PDFium is kept so the import error names
+    the package to install.
     """
-    question_text = "\n".join([f"{i+1}. {q}" for i, q in enumerate(questions)])
+    if importlib.util.find_spec("pypdfium2") is None and shutil.which("pdftotext"):
+        return "pdftotext"
+    return "pdfium"
 
-    prompt = f"""
-Here is my profile and resume:
-- Name: {APPLICANT['name']}
-- Email: {APPLICANT['email']}
-- Phone: {APPLICANT['phone']}
-- LinkedIn: {APPLICANT.get('linkedin', '')}
-- GitHub: {APPLICANT.get('github', '')}
-- Portfolio: {APPLICANT.get('portfolio', '')}
 
-Resume Content:
-{RESUME_TEXT}
+def _pdftotext(path):
+    result = subprocess.run(
+        ["pdftotext", "-enc", "UTF-8", path, "-"], check=True, capture_output=True
+    )
+    # Pages are separated by form feeds and each ends with a newline
+    pages = result.stdout.decode("utf-8").split("\f")
+    return "\n".join(page.strip() for page in pages if page.strip())
 
-Job description:
-{job_description}
 
-Company: {company}
+def _pdfium_text(path):
+    # Imported here so runs that hit the text cache never load PDFium
+    import pypdfium2 as pdfium
 
-Application questions:
-{question_text}
+    # PDFium extracts a page in native code, faster than a worker process
+    # starts, so the pages are read in turn
+    pdf = pdfium.PdfDocument(path)
+    try:
+        page_texts = [_page_text(pdf[i]) for i in range(len(pdf))]
+    finally:
+        pdf.close()
+
+    return "".join(page_text + "\n" for page_text in page_texts if page_text).strip()
+
+
+def _page_text(page):
+    textpage = page.get_textpage()
+    try:
+        return textpage.get_text_range()
+    finally:
+        textpage.close()
+        page.close()
+
+
+def resume_text():
+    """
+    Returns the resume text, extracting it at most once per version of the PDF.
+    """
+    path = APPLICANT["resume_path"]
+    if not path or not os.path.exists(path):
+        return ""
+    return _resume_text_for(path, os.stat(path).st_mtime_ns)
 
-Draft concise, natural answers (4-5 sentences each) for each question,
-tailored to my resume, experience, and the specific company.
+
+@functools.cache
+def _resume_text_for(path, mtime_ns):
+    return extract_resume_text(path)
+
+
+def profile_text():
+    return _build_profile_text(resume_text())
+
+
+# Built once per process; only the resume part of the profile can change.
+# Unset fields are left out rather than sent to Gemini as "None"
+APPLICANT_FIELDS = [
+    ("Name", "name"),
+    ("Email", "email"),
+    ("Phone", "phone"),
+    ("LinkedIn", "linkedin"),
+    ("GitHub", "github"),
+    ("Portfolio", "portfolio"),
+]
+APPLICANT_BLOCK = "\n".join(
+    f"- {label}: {APPLICANT[key]}" for label, key in APPLICANT_FIELDS if APPLICANT[key]
+)
+APPLICANT_HEADER = (
+    f"\nHere is my profile and resume:\n{APPLICANT_BLOCK}\n\nResume Content:\n"
+)
+
+
+@functools.cache
+def _build_profile_text(resume):
+    return "".join([APPLICANT_HEADER, resume, "\n"])
+
+
+# Static instructions come before any job-specific text so every prompt
+# shares a byte-identical prefix (Gemini's implicit cache matches prefixes)
+ANSWER_GUIDELINES = """
+Draft concise, natural answers (4-5 sentences each) for each application
+question below, tailored to my resume, experience, and the specific company.
 Make the answers reflect why I am interested in this company and position.
-Return them in the same numbered format.
 Make sure they are complete, professional, non AI, and ready-to-send answers.
 I don't want to see any placeholders like [Your Name] or [Company].
 No dashes.
 """
-    response = gmodel.generate_content(prompt)
-    output = response.text.strip()
-
-    answers = {}
-    current_idx = None
-    buffer = []
-    for line in output.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        if line[0].isdigit() and "." in line:
-            if current_idx is not None:
-                answers[current_idx] = " ".join(buffer).strip()
-            current_idx = int(line.split(".")[0]) - 1
-            buffer = [".".join(line.split(".")[1:]).strip()]
-        else:
-            if current_idx is not None:
-                buffer.append(line)
-    if current_idx is not None:
-        answers[current_idx] = " ".join(buffer).strip()
-    return answers
 
+ANSWER_INSTRUCTIONS = ANSWER_GUIDELINES + "Return them in the same numbered format.\n"
 
-# -------------------- Cover Letter Generator --------------------
-def generate_cover_letter(job_description: str, company: str, job_title: str):
-    prompt = f"""
-You are an expert career coach. Write a **complete, professional, ready-to-send cover letter** for {APPLICANT['name']} applying to the position of {job_title} at {company}.
-Use the resume below to highlight relevant skills, experience, and measurable achievements.
+# Without FULL_NAME the model takes the name from the resume
+APPLICANT_NAME = APPLICANT["name"] or "the applicant"
+
+COVER_LETTER_INSTRUCTIONS = f"""
+You are an expert career coach. Write a **complete, professional, ready-to-send cover letter** for {APPLICANT_NAME} applying to the position and company given below.
+Use the resume above to highlight relevant skills, experience, and measurable achievements.
 The cover letter must:
 
 - Be fully polished and natural.
 - Do NOT include any placeholders like [Your Name], [Date], [Company Address], or [Platform].
-- Use {APPLICANT['name']}’s real name, but omit address, phone, or email headers.
+- Use {APPLICANT_NAME}’s real name, but omit address, phone, or email headers.
 - Explain why the applicant is excited about this company and role.
 - Include relevant technical skills (Python, React, Node.js, PostgreSQL, MongoDB, AWS, Docker, testing frameworks, etc.).
 - Be concise, tailored to the applicant's experience, and ready to send.
-Resume content:
-{RESUME_TEXT}
+"""
+
+JOB_PACKAGE_INSTRUCTIONS = f"""{COVER_LETTER_INSTRUCTIONS}{ANSWER_GUIDELINES}
+Respond with JSON containing:
+- "cover_letter": the full cover letter, with paragraphs separated by blank lines.
+- "answers": one entry per question, with its number as "index" and the answer as "text".
+"""
+
+JOB_BATCH_INSTRUCTIONS = f"""{COVER_LETTER_INSTRUCTIONS}{ANSWER_GUIDELINES}
+Several jobs follow, each starting with a "===JOB n===" line. Write a separate
+cover letter and separate answers for each job, using only that job's details.
+Respond with JSON containing "jobs": one entry per job with:
+- "job_id": the job's number n.
+- "cover_letter": the full cover letter, with paragraphs separated by blank lines.
+- "answers": one entry per question of that job, with its number as "index" and the answer as "text".
+"""
+
+
+# Schema Gemini must follow for the combined request, so the reply
+# needs no parsing beyond json.loads
+class PackageAnswer(typing.TypedDict):
+    index: int
+    text: str
+
+
+class JobPackage(typing.TypedDict):
+    cover_letter: str
+    answers: list[PackageAnswer]
+
+
+class BatchedJobPackage(typing.TypedDict):
+    job_id: int
+    cover_letter: str
+    answers: list[PackageAnswer]
+
+
+class JobBatch(typing.TypedDict):
+    jobs: list[BatchedJobPackage]
+
+
+def report_cached_tokens(response, label: str):
+    usage = getattr(response, "usage_metadata", None)
+    cached_tokens = getattr(usage, "cached_content_token_count", 0)
+    if cached_tokens:
+        print(f"🗄️ {label}: {cached_tokens} prompt tokens served from cache")
+
+
+# -------------------- Profile Context Cache --------------------
+PROFILE_SYSTEM_INSTRUCTION = (
+    "You help the applicant described in the profile and resume below "
+    "apply for jobs. Write everything in the applicant's own voice."
+)
+
+profile_cache = None
+cached_model = None
+profile_cache_checked = False
+profile_cache_lock = asyncio.Lock()
+# time.monotonic() after which the cache's TTL is extended
+profile_cache_refresh_at = 0.0
+
+
+def init_profile_cache():
+    """
+    Uploads the applicant profile and resume to Gemini's context cache once,
+    so each job only sends its own description and questions.
+    Leaves the inline prompt in place when the profile is too small to cache.
+    """
+    global profile_cache, cached_model, profile_cache_refresh_at
+
+    try:
+        profile = profile_text()
+        token_count = gmodel.count_tokens(profile).total_tokens
+        if token_count < CACHE_MIN_TOKENS:
+            print(
+                f"ℹ️ Profile is {token_count} tokens (cache minimum is "
+                f"{CACHE_MIN_TOKENS}); sending it inline"
+            )
+            return
+
+        profile_cache = caching.CachedContent.create(
+            model=CACHE_MODEL,
+            display_name="job-applyer-profile",
+            system_instruction=PROFILE_SYSTEM_INSTRUCTION,
+            contents=[profile],
+            ttl=CACHE_TTL,
+        )
+        cached_model = genai.GenerativeModel.from_cached_content(
+            cached_content=profile_cache, generation_config=GENERATION_CONFIG
+        )
+        profile_cache_refresh_at = _next_refresh()
+        print(f"🗄️ Cached applicant profile ({token_count} tokens)")
+    except Exception as e:
+        print(f"⚠️ Context caching unavailable, sending profile inline: {e}")
+        profile_cache = None
+        cached_model = None
+
+
+async def ensure_profile_cache():
+    """
+    Creates the profile cache the first time a request actually has to go
+    to Gemini, so fully cached re-runs never upload the resume.
+    """
+    global profile_cache_checked
+    async with profile_cache_lock:
+        if not profile_cache_checked:
+            await asyncio.to_thread(init_profile_cache)
+            profile_cache_checked = True
+        elif profile_cache is not None and time.monotonic() >= profile_cache_refresh_at:
+            await asyncio.to_thread(refresh_profile_cache)
+
+
+def refresh_profile_cache():
+    """
+    Extends the cached profile's TTL so runs longer than CACHE_TTL keep
+    using it. Falls back to the inline profile if the update fails.
+    """
+    global profile_cache, cached_model, profile_cache_refresh_at
+    try:
+        profile_cache.update(ttl=CACHE_TTL)
+        profile_cache_refresh_at = _next_refresh()
+        print("🗄️ Extended the cached profile's TTL")
+    except Exception as e:
+        print(f"⚠️ Could not extend the cached profile, sending it inline: {e}")
+        profile_cache = None
+        cached_model = None
+
+
+def _next_refresh():
+    return time.monotonic() + (CACHE_TTL - CACHE_REFRESH_MARGIN).total_seconds()
+
+
+@functools.cache
+def inline_profile_model(profile: str):
+    """
+    Returns a model carrying the profile as its system instruction, used
+    when the profile isn't in the context cache.
+    User prompts then hold only the job itself.
+    """
+    return genai.GenerativeModel(
+        GEMINI_MODEL,
+        generation_config=GENERATION_CONFIG,
+        system_instruction=f"{PROFILE_SYSTEM_INSTRUCTION}\n{profile}",
+    )
+
+
+def release_profile_cache():
+    # Cached content is billed for storage until its TTL runs out
+    global profile_cache, cached_model
+    if profile_cache is None:
+        return
+    try:
+        profile_cache.delete()
+    except Exception as e:
+        print(f"⚠️ Could not delete the cached profile: {e}")
+    profile_cache = None
+    cached_model = None
+
+
+# -------------------- Gemini Calls --------------------
+async def call_gemini(
+    job_prompt: str,
+    generation_config: dict,
+    company: str,
+    kind: str,
+    stream: bool = False,
+):
+    """
+    Sends a job-specific prompt to Gemini, through the cached profile when
+    there is one and with the profile as system instruction otherwise.
+    Identical requests are answered from the on-disk response cache.
+    """
+    cache_key = response_key(job_prompt, generation_config)
+    text = answer_cache.get_response(cache_key)
+    if text is not None:
+        return text
+
+    await ensure_profile_cache()
+    if cached_model is not None:
+        model = cached_model
+    else:
+        model = inline_profile_model(profile_text())
+    response, text = await _call_gemini(
+        model, job_prompt, generation_config, company, stream
+    )
+    report_cached_tokens(response, f"{company} {kind}")
+
+    answer_cache.put_response(cache_key, text)
+    return text
+
+
+def _report_retry(retry_state):
+    print(
+        f"⏳ Gemini request failed ({retry_state.outcome.exception()}), "
+        f"retrying in {retry_state.next_action.sleep:.1f}s"
+    )
+
+
+# Shared by generation and embedding requests
+gemini_retry = retry(
+    retry=retry_if_exception_type(RETRYABLE_ERRORS),
+    wait=wait_random_exponential(multiplier=1, max=GEMINI_BACKOFF_MAX_SECONDS),
+    stop=stop_after_attempt(GEMINI_MAX_ATTEMPTS),
+    before_sleep=_report_retry,
+    reraise=True,
+)
+
+
+@gemini_retry
+async def _call_gemini(model, prompt, generation_config, company: str, stream: bool):
+    """
+    Makes one Gemini request and returns the response with its text.
+    The semaphore slot is given back while a failed attempt waits to retry,
+    and every attempt takes a token from the rate limiter.
+    """
+    async with gemini_rate_limiter, gemini_semaphore:
+        response = await model.generate_content_async(
+            prompt, generation_config=generation_config, stream=stream
+        )
+        if stream:
+            text = await stream_answers(response, company)
+        else:
+            text = response.text
+    return response, text
+
+
+def response_key(job_prompt: str, generation_config: dict):
+    # The schema class is keyed by name; str() would include the module,
+    # which is "__main__" or "main" depending on how the script is started
+    config = json.dumps(
+        generation_config,
+        sort_keys=True,
+        default=lambda o: getattr(o, "__qualname__", str(o)),
+    )
+    return answer_cache.make_key(
+        gmodel.model_name + config, job_prompt, prefix=profile_text()
+    )
+
+
+# -------------------- AI Answer Generator --------------------
+async def generate_batch_ai_answers(
+    job_description: str, questions: list, company: str
+):
+    """
+    Generates AI answers for a list of application questions,
+    tailored to the applicant's resume and the specific company.
+    """
+    cache_key, embedding, cached_answers = await lookup_cached_answers(
+        job_description, questions, company
+    )
+    if cached_answers is not None:
+        return cached_answers
+
+    job_prompt = build_answer_prompt(job_description, questions, company)
+
+    # Trailing blank lines mean the model has moved past the numbered answers
+    answer_config = {
+        "max_output_tokens": ANSWER_TOKENS_PER_QUESTION * len(questions),
+        "stop_sequences": ["\n\n\n"],
+    }
+    output = await call_gemini(
+        job_prompt, answer_config, company, "answers", stream=True
+    )
+
+    answers = {number - 1: text for number, text in split_numbered_answers(output)}
+
+    answer_cache.put(cache_key, answers, embedding, answer_scope(questions, company))
+    return answers
+
+
+def build_answer_prompt(job_description: str, questions: list, company: str):
+    question_text = "\n".join([f"{i+1}. {q}" for i, q in enumerate(questions)])
+
+    return f"""{ANSWER_INSTRUCTIONS}
+---
+Company: {company}
+
+Job description:
+{job_description}
+
+---
+Application questions:
+{question_text}
+"""
+
+
+async def lookup_cached_answers(job_description: str, questions: list, company: str):
+    """
+    Checks the answer cache for a job's answers prompt.
+    Returns (cache key, embedding or None, answers or None).
+    """
+    job_prompt = build_answer_prompt(job_description, questions, company)
+    cache_key = answer_cache.make_key(
+        gmodel.model_name, job_prompt, prefix=profile_text()
+    )
+    cached_answers = answer_cache.get(cache_key)
+    if cached_answers is not None:
+        return cache_key, None, cached_answers
+
+    # Only the description is compared; answers are indexed by question,
+    # so they are only reused for the same questions, company and profile
+    embedding = None
+    if ANSWER_CACHE_FUZZY:
+        try:
+            embedding = await embed_text(job_description)
+        except Exception as e:
+            # The lookup is only a shortcut; the answers can still be generated
+            print(f"⚠️ {company}: similar-answer lookup failed, generating: {e}")
+        else:
+            cached_answers = answer_cache.get_similar(
+                embedding, answer_scope(questions, company)
+            )
+    return cache_key, embedding, cached_answers
+
+
+def answer_scope(questions: list, company: str):
+    return answer_cache.make_key(
+        gmodel.model_name,
+        json.dumps([company, questions], ensure_ascii=False),
+        prefix=profile_text(),
+    )
+
+
+async def stream_answers(response, company: str):
+    """
+    Collects a streamed answers response, printing each numbered answer
+    as soon as the model starts on the next one.
+    """
+    output = ""
+    printed = 0
+    async for chunk in response:
+        output += _chunk_text(chunk)
+        # Every answer except the last is followed by another numbered answer
+        answers = split_numbered_answers(output)
+        for number, text in answers[printed:-1]:
+            _print_answer(company, number, text)
+        printed = max(printed, len(answers) - 1)
+
+    for number, text in split_numbered_answers(output)[printed:]:
+        _print_answer(company, number, text)
+    return output
+
+
+def split_numbered_answers(output: str):
+    """
+    Returns (number, answer) pairs for the numbered answers in the output,
+    with each answer's whitespace collapsed.
+    """
+    parts = NUMBERED_ANSWER_SPLIT.split(output)
+    return [
+        (int(number), " ".join(body.split()))
+        for number, body in zip(parts[1::2], parts[2::2])
+    ]
+
+
+def _chunk_text(chunk):
+    # Chunks carrying only a finish reason or usage data have no text parts
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+def _print_answer(company: str, number: int, text: str):
+    print(f"💬 {company} #{number}: {text}")
+
+
+@gemini_retry
+async def embed_text(content):
+    """
+    Embeds a text, or a list of texts in one request, under the same
+    retries, concurrency cap and rate limit as generation requests.
+    """
+    async with gemini_rate_limiter, gemini_semaphore:
+        result = await genai.embed_content_async(model=EMBEDDING_MODEL, content=content)
+    return result["embedding"]
+
+
+# -------------------- Question Clustering --------------------
+async def cluster_questions(jobs_data: list):
+    """
+    Groups near-duplicate questions asked by the same company across jobs.
+    Returns a map from (job index, question index) to the (job index,
+    question index) of the earlier question that will be answered instead.
+    """
+    import numpy as np
+
+    positions = [
+        (job_idx, q_idx)
+        for job_idx, row in enumerate(jobs_data)
+        for q_idx in range(len(row.get("Questions", [])))
+    ]
+    if len(positions) < 2:
+        return {}
+
+    texts = [jobs_data[j]["Questions"][q] for j, q in positions]
+    vectors = np.asarray(await embed_text(texts), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1, norms)
+    similar = np.triu(vectors @ vectors.T >= QUESTION_SIMILARITY, k=1)
+
+    # Union-find with the earliest question of each cluster as its root
+    parent = list(range(len(positions)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    companies = [jobs_data[j].get("Company", "") for j, _ in positions]
+    for a, b in zip(*np.nonzero(similar)):
+        if companies[a] != companies[b]:
+            continue
+        root_a, root_b = find(int(a)), find(int(b))
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    return {
+        positions[i]: positions[find(i)] for i in range(len(positions)) if find(i) != i
+    }
+
+
+# -------------------- Cover Letter Generator --------------------
+async def generate_cover_letter_text(
+    job_description: str, company: str, job_title: str
+):
+    job_prompt, cover_letter_config = cover_letter_request(
+        job_description, company, job_title
+    )
+    cover_letter = await call_gemini(
+        job_prompt, cover_letter_config, company, "cover letter"
+    )
+    return cover_letter.strip()
+
+
+def cover_letter_request(job_description: str, company: str, job_title: str):
+    """
+    Returns the prompt and generation config for a cover letter on its own.
+    """
+    job_prompt = f"""{COVER_LETTER_INSTRUCTIONS}
+---
+Position: {job_title}
+Company: {company}
 
 Job description:
 {job_description}
@@ -134,145 +742,539 @@ Job description:
 Write the final cover letter directly, starting with:
 "Dear {company} Hiring Team," and ending with a professional closing including the applicant's name.
 """
-    response = gmodel.generate_content(prompt)
-    cover_letter_content = response.text.strip()
+    return job_prompt, {"max_output_tokens": COVER_LETTER_MAX_TOKENS}
+
+
+# -------------------- Job Package Generator --------------------
+async def generate_job_artifacts(
+    job_description: str, company: str, job_title: str, questions: list
+):
+    """
+    Generates the cover letter and the question answers for one job
+    in a single Gemini request.
+    Returns (answers dict keyed by question index, cover letter text).
+    """
+    if not questions:
+        cover_letter = await generate_cover_letter_text(
+            job_description, company, job_title
+        )
+        return {}, cover_letter
+
+    job_prompt, package_config = package_request(
+        job_description, company, job_title, questions
+    )
+
+    # With answers cached from another run, only the cover letter is missing
+    cache_key, embedding = None, None
+    if answer_cache.get_response(response_key(job_prompt, package_config)) is None:
+        cache_key, embedding, cached_answers = await lookup_cached_answers(
+            job_description, questions, company
+        )
+        if cached_answers is not None:
+            cover_letter = await generate_cover_letter_text(
+                job_description, company, job_title
+            )
+            return cached_answers, cover_letter
+
+    output = await call_gemini(job_prompt, package_config, company, "application")
+
+    try:
+        package = json.loads(output)
+    except json.JSONDecodeError:
+        print(f"⚠️ {company}: combined response was not JSON, retrying separately")
+        answers, cover_letter = await asyncio.gather(
+            generate_batch_ai_answers(job_description, questions, company),
+            generate_cover_letter_text(job_description, company, job_title),
+        )
+        return answers, cover_letter
+
+    answers = package_answers(package)
+    if cache_key is not None:
+        answer_cache.put(
+            cache_key, answers, embedding, answer_scope(questions, company)
+        )
+    return answers, package.get("cover_letter", "").strip()
+
+
+def package_request(
+    job_description: str, company: str, job_title: str, questions: list
+):
+    """
+    Returns the prompt and generation config for one job's combined
+    cover letter and answers request.
+    """
+    question_text = "\n".join([f"{i+1}. {q}" for i, q in enumerate(questions)])
+    job_prompt = f"""{JOB_PACKAGE_INSTRUCTIONS}
+---
+Position: {job_title}
+Company: {company}
+
+Job description:
+{job_description}
+
+---
+Application questions:
+{question_text}
+
+Start the cover letter with "Dear {company} Hiring Team," and end it with a
+professional closing including the applicant's name.
+"""
+    package_config = {
+        "response_mime_type": "application/json",
+        "response_schema": JobPackage,
+        "max_output_tokens": COVER_LETTER_MAX_TOKENS
+        + ANSWER_TOKENS_PER_QUESTION * len(questions),
+    }
+    return job_prompt, package_config
 
-    save_cover_letter_pdf(company, job_title, cover_letter_content)
 
-    return cover_letter_content
+def package_answers(package: dict):
+    return {
+        item["index"] - 1: " ".join(item["text"].split())
+        for item in package.get("answers", [])
+        if isinstance(item.get("index"), int) and isinstance(item.get("text"), str)
+    }
 
 
-# -------------------- Save Cover Letter PDF --------------------
-def save_cover_letter_pdf(company: str, job_title: str, cover_letter: str):
-    # Ensure the output folder exists
-    if not os.path.exists(COVER_LETTER_PDFS_DIR):
-        os.makedirs(COVER_LETTER_PDFS_DIR)
+async def generate_job_batch(jobs: list):
+    """
+    Generates the cover letters and answers for several jobs in a single
+    Gemini request. Takes (job description, company, job title, questions)
+    tuples and returns (answers, cover letter) for each, in order.
+    Jobs already in the caches, and jobs missing from the reply, are
+    generated on their own.
+    """
+    if len(jobs) == 1:
+        return [await generate_job_artifacts(*jobs[0])]
+
+    # Jobs answered in an earlier run, alone or in another group, come from
+    # the caches; only the rest go into the batched request
+    lookups = await asyncio.gather(*(_lookup_job(*job) for job in jobs))
+    uncached = [pos for pos, lookup in enumerate(lookups) if lookup is not None]
+    cached = [pos for pos, lookup in enumerate(lookups) if lookup is None]
+    batch_results, *cached_results = await asyncio.gather(
+        _generate_uncached_batch(
+            [jobs[pos] for pos in uncached], [lookups[pos] for pos in uncached]
+        ),
+        *(generate_job_artifacts(*jobs[pos]) for pos in cached),
+    )
+    results = dict(zip(uncached, batch_results)) | dict(zip(cached, cached_results))
+    return [results[pos] for pos in range(len(jobs))]
 
-    # File name includes company and job title (kept for organization)
-    filename = f"{company}_{job_title}_CoverLetter.pdf".replace(" ", "_")
-    filepath = os.path.join(COVER_LETTER_PDFS_DIR, filename)
 
-    # Split cover letter into paragraphs
-    paragraphs = cover_letter.split("\n\n")
+async def _lookup_job(
+    job_description: str, company: str, job_title: str, questions: list
+):
+    """
+    Returns None when the job can be served from the caches, else the
+    answers cache lookup (cache key, embedding) to store its answers under.
+    """
+    if not questions:
+        job_prompt, config = cover_letter_request(job_description, company, job_title)
+        if answer_cache.get_response(response_key(job_prompt, config)) is not None:
+            return None
+        return None, None
 
-    # Pass empty string for title to avoid the bold heading in the PDF
-    save_paragraph_pdf(filepath, "", paragraphs)
+    job_prompt, config = package_request(job_description, company, job_title, questions)
+    if answer_cache.get_response(response_key(job_prompt, config)) is not None:
+        return None
+    cache_key, embedding, cached_answers = await lookup_cached_answers(
+        job_description, questions, company
+    )
+    if cached_answers is not None:
+        return None
+    return cache_key, embedding
 
-    print(f"📄 Saved cover letter PDF: {filepath}")
 
+async def _generate_uncached_batch(jobs: list, lookups: list):
+    """
+    Generates the jobs together and stores each job's answers, and its
+    part of the reply as if it had been generated alone.
+    """
+    if len(jobs) <= 1:
+        return [await generate_job_artifacts(*job) for job in jobs]
 
-# -------------------- PDF Helpers --------------------
-def save_paragraph_pdf(filepath, title, paragraphs):
+    sections = []
+    for job_id, (job_description, company, job_title, questions) in enumerate(jobs, 1):
+        question_text = "\n".join([f"{i+1}. {q}" for i, q in enumerate(questions)])
+        sections.append(f"""===JOB {job_id}===
+Position: {job_title}
+Company: {company}
 
-    doc = SimpleDocTemplate(
-        filepath,
-        pagesize=LETTER,
-        rightMargin=0.75 * inch,
-        leftMargin=0.75 * inch,
-        topMargin=0.75 * inch,
-        bottomMargin=0.75 * inch,
+Job description:
+{job_description}
+
+Application questions:
+{question_text or "(none)"}
+
+Start this cover letter with "Dear {company} Hiring Team," and end it with a
+professional closing including the applicant's name.
+""")
+    job_prompt = f"{JOB_BATCH_INSTRUCTIONS}\n---\n" + "\n".join(sections)
+    batch_config = {
+        "response_mime_type": "application/json",
+        "response_schema": JobBatch,
+        "max_output_tokens": sum(
+            COVER_LETTER_MAX_TOKENS + ANSWER_TOKENS_PER_QUESTION * len(job[3])
+            for job in jobs
+        ),
+    }
+
+    companies = ", ".join(job[1] for job in jobs)
+    output = await call_gemini(job_prompt, batch_config, companies, "batch")
+
+    packages = {}
+    try:
+        for package in json.loads(output).get("jobs", []):
+            if isinstance(package.get("job_id"), int):
+                packages[package["job_id"]] = package
+    except (json.JSONDecodeError, AttributeError):
+        print(f"⚠️ {companies}: batched response was not JSON")
+    missing = len(jobs) - len(packages.keys() & range(1, len(jobs) + 1))
+    if missing:
+        print(f"⚠️ {companies}: {missing} jobs missing from the batch, retrying each")
+
+    async def job_result(job_id, job, lookup):
+        package = packages.get(job_id)
+        if package is None:
+            return await generate_job_artifacts(*job)
+        answers = package_answers(package)
+        cover_letter = package.get("cover_letter", "").strip()
+        _store_job_result(job, lookup, answers, cover_letter)
+        return answers, cover_letter
+
+    return await asyncio.gather(
+        *(
+            job_result(job_id, job, lookup)
+            for job_id, (job, lookup) in enumerate(zip(jobs, lookups), 1)
+        )
     )
-    styles = getSampleStyleSheet()
-    story = []
 
-    if title:
-        story.append(Paragraph(f"<b>{title}</b>", styles["Heading2"]))
-        story.append(Spacer(1, 0.2 * inch))
 
-    for para in paragraphs:
-        para = para.replace("\n", "<br/>")
-        story.append(Paragraph(para, styles["Normal"]))
-        story.append(Spacer(1, 0.15 * inch))
+def _store_job_result(job: tuple, lookup: tuple, answers: dict, cover_letter: str):
+    job_description, company, job_title, questions = job
+    if not questions:
+        job_prompt, config = cover_letter_request(job_description, company, job_title)
+        answer_cache.put_response(response_key(job_prompt, config), cover_letter)
+        return
+
+    cache_key, embedding = lookup
+    answer_cache.put(cache_key, answers, embedding, answer_scope(questions, company))
+    job_prompt, config = package_request(job_description, company, job_title, questions)
+    package = {
+        "cover_letter": cover_letter,
+        "answers": [
+            {"index": index + 1, "text": text} for index, text in answers.items()
+        ],
+    }
+    answer_cache.put_response(
+        response_key(job_prompt, config), json.dumps(package, ensure_ascii=False)
+    )
 
-    doc.build(story)
 
+def start_generation(jobs_by_key: dict):
+    """
+    Starts generating every distinct job, JOBS_PER_REQUEST jobs per
+    request. Returns a task per job key resolving to (answers, cover letter).
+    """
+    if JOBS_PER_REQUEST == 1:
+        return {
+            key: asyncio.create_task(generate_job_artifacts(*args))
+            for key, args in jobs_by_key.items()
+        }
 
-# -------------------- Save Q&A PDF --------------------
-def save_qa_pdf(company: str, job_title: str, qa_pairs: list):
-    if not os.path.exists(QA_PDFS_DIR):
-        os.makedirs(QA_PDFS_DIR)
+    keys = list(jobs_by_key)
+    tasks = {}
+    for start in range(0, len(keys), JOBS_PER_REQUEST):
+        group = keys[start : start + JOBS_PER_REQUEST]
+        batch = asyncio.create_task(
+            generate_job_batch([jobs_by_key[key] for key in group])
+        )
+        for pos, key in enumerate(group):
+            tasks[key] = asyncio.create_task(_batch_result(batch, pos))
+    return tasks
 
-    # Keep the filename descriptive
-    filename = f"{company}_{job_title}_QA.pdf".replace(" ", "_")
-    filepath = os.path.join(QA_PDFS_DIR, filename)
 
-    paragraphs = []
-    for qa in qa_pairs:
-        paragraphs.append(f"<b>Q:</b> {qa['question']}")
-        paragraphs.append(f"<b>A:</b> {qa['answer']}")
-        paragraphs.append("")  # extra spacing
+async def _batch_result(batch, pos: int):
+    return (await batch)[pos]
 
-    # Pass empty string for title to avoid bold heading
-    save_paragraph_pdf(filepath, "", paragraphs)
 
-    print(f"📄 Saved Q&A PDF: {filepath}")
+# -------------------- File Names --------------------
+def safe_filename(name: str) -> str:
+    return UNSAFE_FILENAME_CHARS.sub("_", name)
 
 
 # -------------------- Main --------------------
-def main():
-    all_jobs = []
-
-    with open(JOB_LIST_JSON, "r", encoding="utf-8") as f:
-        jobs_data = json.load(f)
-
-    for row in jobs_data:
-        company = row.get("Company", "")
-        title = row.get("Job Title", "")
-        job_url = row.get("Job URL", "")
-        job_description = row.get("Job Description", "")
-        questions = row.get("Questions", [])
-
-        qa_pairs = []
-        if questions:
-            answers = generate_batch_ai_answers(job_description, questions, company)
-            qa_pairs = [
-                {"question": q, "answer": answers.get(i, "")}
-                for i, q in enumerate(questions)
-            ]
+async def collect_answers(job_idx, asked, answered_by, job_tasks):
+    """
+    Waits for one job's answers, including answers borrowed from
+    duplicate questions answered for another job.
+    Returns a dict keyed by the question's index in the job.
+    """
+    answers = await _asked_answers(job_idx, asked, job_tasks)
+    for (member_job, q_idx), (src_job, src_q) in answered_by.items():
+        if member_job == job_idx:
+            src_answers = await _asked_answers(src_job, asked, job_tasks)
+            answers[q_idx] = src_answers.get(src_q, "")
+    return answers
+
+
+async def _asked_answers(job_idx, asked, job_tasks):
+    try:
+        result, _ = await job_tasks[job_idx]
+    except Exception:
+        # The failure is reported by the job that owns the task
+        return {}
+    return {
+        asked[job_idx][k]: answer
+        for k, answer in result.items()
+        if 0 <= k < len(asked[job_idx])
+    }
+
+
+async def process_job(row: dict, job_task, answers_coro, pdf_pool):
+    company = row.get("Company", "")
+    title = row.get("Job Title", "")
+    job_url = row.get("Job URL", "")
+    questions = row.get("Questions", [])
 
-        cover_letter_content = generate_cover_letter(job_description, company, title)
+    answers = await answers_coro
+    _, cover_letter_content = await job_task
 
-        if qa_pairs:
-            save_qa_pdf(company, title, qa_pairs)
+    qa_pairs = [
+        {"question": q, "answer": answers.get(i, "")} for i, q in enumerate(questions)
+    ]
 
-        all_jobs.append(
-            {
-                "Company": company,
-                "Job Title": title,
-                "Job URL": job_url,
-                "Questions": qa_pairs,
-                "CoverLetter": cover_letter_content,
-            }
+    # Named like the job's record, so listings that share a company and
+    # title don't render over each other's PDFs in parallel workers
+    file_stem = job_file_stem(row)
+    loop = asyncio.get_running_loop()
+    renders = [
+        loop.run_in_executor(
+            pdf_pool,
+            pdf_export.save_cover_letter_pdf,
+            COVER_LETTER_PDFS_DIR / f"{file_stem}_CoverLetter.pdf",
+            cover_letter_content,
         )
+    ]
+    if qa_pairs:
+        renders.append(
+            loop.run_in_executor(
+                pdf_pool,
+                pdf_export.save_qa_pdf,
+                QA_PDFS_DIR / f"{file_stem}_QA.pdf",
+                qa_pairs,
+            )
+        )
+    await asyncio.gather(*renders)
+
+    record = {
+        "Company": company,
+        "Job Title": title,
+        "Job URL": job_url,
+        "Questions": qa_pairs,
+        "CoverLetter": cover_letter_content,
+    }
+    # Written whole or not at all, so an interrupted run never leaves a
+    # truncated record that the next run would skip as done. Nothing awaits
+    # between open and replace, so jobs can't collide on the temp name
+    path = shard_path(row)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(record, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, path)
+
+
+def job_key(job_description: str, company: str, job_title: str, questions: list):
+    """
+    Returns a content hash of everything that goes into a job's prompt.
+    """
+    # Null fields in the job list hash like empty ones instead of failing
+    parts = [job_description, company, job_title, *(questions or [])]
+    return hashlib.blake2b(
+        "\x01".join(str(part or "") for part in parts).encode("utf-8"),
+        digest_size=16,
+    ).hexdigest()
+
+
+def shard_path(row: dict):
+    """
+    Returns where a job's record is stored. The name hashes the URL and
+    everything in the prompt, so listings that share a company and title
+    stay apart and an edited description or question list is regenerated.
+    """
+    return OUTPUT_SHARDS_DIR / f"{job_file_stem(row)}.json"
+
+
+def job_file_stem(row: dict):
+    # Shared by the job's record and its PDFs
+    company = row.get("Company", "")
+    title = row.get("Job Title", "")
+    content_key = job_key(
+        row.get("Job Description", ""), company, title, row.get("Questions", [])
+    )
+    digest = hashlib.blake2b(
+        f"{row.get('Job URL', '')}\x01{content_key}".encode("utf-8"), digest_size=8
+    ).hexdigest()
+    slug = safe_filename(f"{company}_{title}")
+    return f"{slug}_{digest}"
+
+
+def write_output_json(shard_paths: list, json_path: str):
+    """
+    Merges the job records into one indented JSON array in job list order,
+    a record at a time. Jobs without a record (failed runs) are left out.
+    The previous output.json stays intact until the new one is complete.
+    """
+    tmp_path = f"{json_path}.tmp"
+    with open(tmp_path, "wb") as dst:
+        dst.write(b"[")
+        count = 0
+        for path in shard_paths:
+            if not path.exists():
+                continue
+            dst.write(b",\n  " if count else b"\n  ")
+            dst.write(path.read_bytes().replace(b"\n", b"\n  "))
+            count += 1
+        dst.write(b"\n]" if count else b"]")
+    os.replace(tmp_path, json_path)
+
+
+async def main(use_cache: bool = LLM_CACHE_ENABLED):
+    with open(JOB_LIST_JSON, "rb") as f:
+        all_jobs_data = orjson.loads(f.read())
+    shard_paths = [shard_path(row) for row in all_jobs_data]
+
+    # Left closed, the cache misses on every lookup and stores nothing
+    if use_cache:
+        answer_cache.open_cache(ANSWER_CACHE_DB)
+
+    # Without the cache every job is regenerated, even those already done.
+    # Identical rows share one record and one set of PDFs, so only the first
+    # is processed; otherwise two workers would write the same files at once
+    jobs_data = []
+    seen_paths = set()
+    for row, path in zip(all_jobs_data, shard_paths):
+        if path in seen_paths:
+            continue
+        seen_paths.add(path)
+        if not (use_cache and path.exists()):
+            jobs_data.append(row)
+    duplicates = len(all_jobs_data) - len(seen_paths)
+    if duplicates:
+        print(f"♻️ Processing {duplicates} identical job rows once")
+    skipped = len(seen_paths) - len(jobs_data)
+    if skipped:
+        print(f"⏭️ Skipping {skipped} jobs already saved in {OUTPUT_SHARDS_DIR}")
+
+    # Interrupted or failed runs release the cached profile too, since it
+    # stays billed until its TTL runs out
+    try:
+        answered_by = {}
+        if CLUSTER_QUESTIONS:
+            try:
+                answered_by = await cluster_questions(jobs_data)
+                print(f"🧩 Reusing answers for {len(answered_by)} duplicate questions")
+            except Exception as e:
+                print(f"⚠️ Question clustering failed, answering every question: {e}")
+
+        # Question indices each job still has to ask Gemini itself
+        asked = {
+            i: [
+                q_idx
+                for q_idx in range(len(row.get("Questions", [])))
+                if (i, q_idx) not in answered_by
+            ]
+            for i, row in enumerate(jobs_data)
+        }
+
+        # One combined request per distinct job (or per JOBS_PER_REQUEST jobs),
+        # all in flight at once (bounded by the semaphore); tasks so clustered
+        # questions can borrow across jobs and repeated listings share a request
+        jobs_by_key = {}
+        job_keys = []
+        for i, row in enumerate(jobs_data):
+            args = (
+                row.get("Job Description", ""),
+                row.get("Company", ""),
+                row.get("Job Title", ""),
+                [row["Questions"][q_idx] for q_idx in asked[i]],
+            )
+            key = job_key(*args)
+            if key in jobs_by_key:
+                print(f"♻️ {args[1]} is listed more than once; generating it once")
+            else:
+                jobs_by_key[key] = args
+            job_keys.append(key)
+        tasks_by_key = start_generation(jobs_by_key)
+        job_tasks = [tasks_by_key[key] for key in job_keys]
+
+        # Leaving the block waits for every PDF before output.json is written
+        # Spawned rather than forked: by now gRPC and the to_thread pool have
+        # threads running, which a forked child would inherit mid-lock
+        pdf_workers = max(1, min(PDF_WORKERS, len(jobs_data)))
+        with ProcessPoolExecutor(
+            max_workers=pdf_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pdf_pool:
+            # Workers start while the first Gemini requests are in flight,
+            # rather than when the first PDF is ready to render
+            for _ in range(pdf_workers):
+                pdf_pool.submit(pdf_export.warm_up)
+            results = await asyncio.gather(
+                *(
+                    process_job(
+                        row,
+                        job_tasks[i],
+                        collect_answers(i, asked, answered_by, job_tasks),
+                        pdf_pool,
+                    )
+                    for i, row in enumerate(jobs_data)
+                ),
+                return_exceptions=True,
+            )
+    finally:
+        release_profile_cache()
+
+    for row, result in zip(jobs_data, results):
+        if isinstance(result, Exception):
+            print(f"⚠️ Failed to process {row.get('Company', '')}: {result}")
 
     # Save structured JSON output
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(all_jobs, f, ensure_ascii=False, indent=2)
+    write_output_json(shard_paths, OUTPUT_JSON)
 
     print(f"\n✅ All AI answers saved to {OUTPUT_JSON}")
+    print(f"✅ Per-job records saved in folder: {OUTPUT_SHARDS_DIR}")
     print(f"✅ Cover letters saved in folder: {COVER_LETTER_PDFS_DIR}")
     print(f"✅ Q&A PDFs saved in folder: {QA_PDFS_DIR}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="ignore cached Gemini responses and answers for this run",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(main(use_cache=LLM_CACHE_ENABLED and not args.no_cache))
 
-    # generate_cover_letter(
+    # print(asyncio.run(generate_cover_letter_text(
     #     """
     # CLICS is a beauty tech company located in San Diego, CA and has invented the industry’s first hair color digital studio that completely optimizes the way salons formulate, dispense, and manage hair color. With an innovative mobile app and computer-controlled platform, CLICS allows hair colorists to create any shade of demi or permanent color with the touch of a button. CLICS is a leader in industry-first beauty salon automation technologies and proud to be an equal opportunity employer.
     #         """,
     #     "CLICS",
     #     "Senior Software Engineer",
-    # )
+    # )))
 
-    # answers = generate_batch_ai_answers(
+    # answers = asyncio.run(generate_batch_ai_answers(
     #     """
     #     job description: Finch Care is seeking a passionate and skilled Senior Software Engineer to join our dynamic team. As a key member of our engineering department, you will play a crucial role in designing, developing, and maintaining our cutting-edge healthcare platform. You will collaborate with cross-functional teams to deliver high-quality software solutions that enhance patient care and streamline healthcare operations.
 
     #                         """,
     #     ["What interests you about working for this company?"],
     #     "Finch Care",
-    # )
+    # ))
     # print(list(answers.values())[0])
 
     print("Done ✅")
@@ -0,0 +1,90 @@
+import functools
+from xml.sax.saxutils import escape
+
+# Only ReportLab is imported here (on the first render), so the PDF
+# worker processes get these functions without Gemini's client setup
+
+
+# -------------------- Save Cover Letter PDF --------------------
+def save_cover_letter_pdf(filepath, cover_letter: str):
+    # Split cover letter into paragraphs; escaped since Paragraph parses markup
+    paragraphs = [escape(para) for para in cover_letter.split("\n\n")]
+
+    # Pass empty string for title to avoid the bold heading in the PDF
+    save_paragraph_pdf(filepath, "", paragraphs)
+
+    print(f"📄 Saved cover letter PDF: {filepath}")
+
+
+# -------------------- Save Q&A PDF --------------------
+def save_qa_pdf(filepath, qa_pairs: list):
+    # One paragraph per pair; the text is escaped so "R&D" or "List<T>"
+    # isn't read as markup
+    paragraphs = [
+        f"<b>Q:</b> {escape(qa['question'])}<br/><b>A:</b> {escape(qa['answer'])}"
+        for qa in qa_pairs
+    ]
+
+    # Pass empty string for title to avoid bold heading
+    save_paragraph_pdf(filepath, "", paragraphs)
+
+    print(f"📄 Saved Q&A PDF: {filepath}")
+
+
+# -------------------- PDF Helpers --------------------
+@functools.cache
+def _pdf_setup():
+    """
+    Imports ReportLab and builds the stylesheet and page setup on the
+    first render, so runs that build no PDF never load it.
+    Styles are only read while rendering, so every PDF shares them.
+    """
+    from reportlab.lib.pagesizes import LETTER
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import inch
+
+    styles = getSampleStyleSheet()
+    doc_template_kwargs = {
+        "pagesize": LETTER,
+        "rightMargin": 0.75 * inch,
+        "leftMargin": 0.75 * inch,
+        "topMargin": 0.75 * inch,
+        "bottomMargin": 0.75 * inch,
+    }
+    return styles["Normal"], styles["Heading2"], doc_template_kwargs
+
+
+def warm_up():
+    """
+    Loads ReportLab in a worker ahead of its first PDF.
+    """
+    _pdf_setup()
+
+
+def save_paragraph_pdf(filepath, title, paragraphs):
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.units import inch
+
+    normal, h2, doc_template_kwargs = _pdf_setup()
+
+    # ReportLab only accepts str filenames, not Path objects
+    doc = SimpleDocTemplate(str(filepath), **doc_template_kwargs)
+    story = []
+
+    if title:
+        story.append(Paragraph(f"<b>{title}</b>", h2))
+        story.append(Spacer(1, 0.2 * inch))
+
+    # Flowables hold the canvas while drawing, so a spacer can be reused
+    # within one document but not shared with renders on other threads
+    gap = Spacer(1, 0.15 * inch)
+    for para in paragraphs:
+        # Blank paragraphs (e.g. from runs of blank lines) would still be
+        # laid out, adding a stray gap each
+        if not para.strip():
+            continue
+        para = para.replace("\n", "<br/>")
+        story.append(Paragraph(para, normal))
+        story.append(gap)
+
+    doc.build(story)